@@ -12,6 +12,560 @@ import { Upload, FileText, Table, CheckSquare, Square, Play, FileSpreadsheet, Al
 import * as XLSX from 'xlsx';
 import * as mammoth from 'mammoth';
 
+// Número máximo de linhas amostradas por arquivo no perfil das colunas
+const PROFILE_SAMPLE_SIZE = 20000;
+// Precisão do HyperLogLog: 2^12 registradores (~1,6% de erro padrão)
+const HLL_PRECISION = 12;
+// Fração mínima de valores não vazios que precisam ter o mesmo tipo
+const TYPE_THRESHOLD = 0.9;
+// Critérios para uma coluna ser candidata a chave de conciliação
+const KEY_MAX_NULL_RATE = 0.05;
+const KEY_MAX_CANDIDATES = 8;
+const KEY_UNIQUENESS_TARGET = 0.999;
+
+const DATE_PATTERN = /^(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}|\d{4}-\d{2}-\d{2})/;
+const AMOUNT_PATTERN = /^\(?[-+]?\s*(R\$\s*)?[-+]?\d[\d.,]*\)?\s*[DC]?$/i;
+
+const TYPE_LABELS = { date: 'Data', amount: 'Valor', text: 'Texto', empty: 'Vazia' };
+
+// Equivalente ao unidecode: remove acentos, caixa e pontuação
+const normalizeText = (value) => String(value ?? '')
+  .normalize('NFD')
+  .replace(/[\u0300-\u036f]/g, '')
+  .toLowerCase()
+  .replace(/[^a-z0-9]+/g, ' ')
+  .trim();
+
+const isEmptyValue = (value) =>
+  value === undefined || value === null || String(value).trim() === '';
+
+// Mistura final do MurmurHash3, aplicada sobre o FNV-1a
+const finalizeHash = (hash) => {
+  let h = hash;
+  h ^= h >>> 16;
+  h = Math.imul(h, 0x85ebca6b);
+  h ^= h >>> 13;
+  h = Math.imul(h, 0xc2b2ae35);
+  h ^= h >>> 16;
+  return h >>> 0;
+};
+
+// FNV-1a de 32 bits com mistura final do MurmurHash3
+const hashString = (str, seed = 0x811c9dc5) => {
+  let h = seed >>> 0;
+  for (let i = 0; i < str.length; i++) {
+    h ^= str.charCodeAt(i);
+    h = Math.imul(h, 0x01000193);
+  }
+  return finalizeHash(h);
+};
+
+// Letras latinas acentuadas (até U+024F) já normalizadas como no normalizeText: '' marca
+// um separador. Outros caracteres não ASCII passam pelo normalizeText completo.
+const LATIN_FOLDING = Array.from({ length: 0x250 }, (_, code) =>
+  code < 128 ? null : normalizeText(String.fromCharCode(code)));
+
+// Mesmo resultado de hashString(normalizeText(value)) em uma única passada, sem criar
+// strings intermediárias
+const hashNormalizedText = (value) => {
+  const text = String(value);
+  let h = 0x811c9dc5;
+  let started = false;
+  let pendingSpace = false;
+  for (let i = 0; i < text.length; i++) {
+    let code = text.charCodeAt(i);
+    if (code >= 128) {
+      if (code >= LATIN_FOLDING.length) return hashString(normalizeText(text));
+      const folded = LATIN_FOLDING[code];
+      if (folded.length !== 1) {
+        if (folded.length === 0) {
+          pendingSpace = true;
+          continue;
+        }
+        return hashString(normalizeText(text));
+      }
+      code = folded.charCodeAt(0);
+    } else if (code >= 65 && code <= 90) {
+      code += 32;
+    }
+    if ((code >= 97 && code <= 122) || (code >= 48 && code <= 57)) {
+      if (pendingSpace && started) {
+        h ^= 32;
+        h = Math.imul(h, 0x01000193);
+      }
+      h ^= code;
+      h = Math.imul(h, 0x01000193);
+      started = true;
+      pendingSpace = false;
+    } else {
+      pendingSpace = true;
+    }
+  }
+  return finalizeHash(h);
+};
+
+// Mistura um inteiro de 32 bits no hash (finalizador do MurmurHash3)
+const mixHash = (hash, value) => {
+  let h = Math.imul(hash ^ value, 0x85ebca6b);
+  h ^= h >>> 13;
+  h = Math.imul(h, 0xc2b2ae35);
+  return (h ^ (h >>> 16)) >>> 0;
+};
+
+const float64View = new Float64Array(1);
+const float64Words = new Uint32Array(float64View.buffer);
+
+// Hash de uma célula sem convertê-la para texto: números entram pelos bits do float64
+const hashCell = (value) => {
+  if (typeof value === 'number') {
+    float64View[0] = value;
+    return mixHash(mixHash(0x811c9dc5, float64Words[0]), float64Words[1]);
+  }
+  return hashString(String(value));
+};
+
+const createDistinctSketch = () => new Uint8Array(1 << HLL_PRECISION);
+
+const addToSketch = (registers, hash) => {
+  const index = hash >>> (32 - HLL_PRECISION);
+  const rank = Math.min(Math.clz32(hash << HLL_PRECISION) + 1, 33 - HLL_PRECISION);
+  if (rank > registers[index]) {
+    registers[index] = rank;
+  }
+};
+
+const estimateDistinct = (registers) => {
+  const m = registers.length;
+  let sum = 0;
+  let zeros = 0;
+  for (let i = 0; i < m; i++) {
+    sum += 2 ** -registers[i];
+    if (registers[i] === 0) zeros++;
+  }
+  const estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum;
+  // Correção para cardinalidades pequenas (linear counting)
+  if (estimate <= 2.5 * m && zeros > 0) {
+    return Math.round(m * Math.log(m / zeros));
+  }
+  return Math.round(estimate);
+};
+
+const inferValueType = (value) => {
+  if (typeof value === 'number') return 'amount';
+  const text = String(value).trim();
+  if (DATE_PATTERN.test(text)) return 'date';
+  if (AMOUNT_PATTERN.test(text)) return 'amount';
+  return 'text';
+};
+
+const pad2 = (number) => String(number).padStart(2, '0');
+
+const formatTime = (hours, minutes, seconds) =>
+  `${pad2(hours)}:${pad2(minutes)}${seconds ? `:${pad2(seconds)}` : ''}`;
+
+// Datas nativas do Excel viram texto dd/mm/aaaa, como nos extratos exportados. A hora
+// é mantida quando não é meia-noite, e células só de hora (dia zero do Excel, 30/12/1899)
+// viram hh:mm[:ss].
+const formatExcelDate = (date) => {
+  const timeOnly = date.getTime() - new Date(1899, 11, 30).getTime();
+  if (timeOnly >= 0 && timeOnly < 86400000) {
+    const seconds = Math.min(Math.round(timeOnly / 1000), 86399);
+    return formatTime(Math.floor(seconds / 3600), Math.floor(seconds / 60) % 60, seconds % 60);
+  }
+
+  const rounded = new Date(Math.round(date.getTime() / 1000) * 1000);
+  const day = `${pad2(rounded.getDate())}/${pad2(rounded.getMonth() + 1)}/${rounded.getFullYear()}`;
+  if (rounded.getHours() === 0 && rounded.getMinutes() === 0 && rounded.getSeconds() === 0) {
+    return day;
+  }
+  return `${day} ${formatTime(rounded.getHours(), rounded.getMinutes(), rounded.getSeconds())}`;
+};
+
+const sampleRows = (rows) => {
+  const step = Math.max(1, Math.ceil(rows.length / PROFILE_SAMPLE_SIZE));
+  const sample = [];
+  for (let i = 0; i < rows.length; i += step) {
+    sample.push(rows[i] || []);
+  }
+  return sample;
+};
+
+const profileColumns = (data) => {
+  const { rows } = data;
+  const sample = sampleRows(rows);
+
+  const columns = data.headers.map((header, columnIndex) => {
+    // Contagem de distintos no arquivo inteiro: o sketch percorre todas as linhas com
+    // memória fixa, enquanto tipo, vazios e unicidade vêm da amostra
+    const sketch = createDistinctSketch();
+    for (let i = 0; i < rows.length; i++) {
+      const row = rows[i];
+      const value = row ? row[columnIndex] : undefined;
+      if (value !== undefined && value !== null && value !== '') {
+        addToSketch(sketch, hashCell(value));
+      }
+    }
+
+    // A amostra tem no máximo PROFILE_SAMPLE_SIZE linhas: a unicidade é contada
+    // exatamente, já que o erro do HyperLogLog esconderia colunas 100% únicas
+    const seen = new Set();
+    const typeCounts = { date: 0, amount: 0, text: 0 };
+    let nonEmpty = 0;
+
+    for (let i = 0; i < sample.length; i++) {
+      const value = sample[i][columnIndex];
+      if (isEmptyValue(value)) continue;
+      nonEmpty++;
+      typeCounts[inferValueType(value)]++;
+      seen.add(String(value).trim());
+    }
+
+    const dominantType = Object.keys(typeCounts)
+      .reduce((best, type) => (typeCounts[type] > typeCounts[best] ? type : best), 'text');
+
+    return {
+      header,
+      index: columnIndex,
+      normalizedName: normalizeText(header),
+      type: nonEmpty === 0
+        ? 'empty'
+        : typeCounts[dominantType] / nonEmpty >= TYPE_THRESHOLD ? dominantType : 'text',
+      nullRate: sample.length > 0 ? 1 - nonEmpty / sample.length : 1,
+      distinctEstimate: estimateDistinct(sketch),
+      uniqueness: nonEmpty > 0 ? seen.size / nonEmpty : 0
+    };
+  });
+
+  return {
+    columns,
+    sample,
+    totalRows: rows.length
+  };
+};
+
+// Cada cabeçalho da comparação é usado uma única vez: nomes idênticos têm prioridade e
+// os demais casam pelo nome normalizado. Colisões (ex.: "Valor" e "valor") ficam sem par.
+const buildHeaderMapping = (baseHeaders, comparisonHeaders) => {
+  const mapping = {};
+  const matchedComparison = new Set();
+  const comparisonSet = new Set(comparisonHeaders);
+  baseHeaders.forEach(header => {
+    if (comparisonSet.has(header) && !matchedComparison.has(header)) {
+      mapping[header] = header;
+      matchedComparison.add(header);
+    }
+  });
+
+  const comparisonByName = new Map();
+  comparisonHeaders.forEach(header => {
+    const name = normalizeText(header);
+    if (!matchedComparison.has(header) && !comparisonByName.has(name)) {
+      comparisonByName.set(name, header);
+    }
+  });
+
+  const unmatchedBase = [];
+  baseHeaders.forEach(header => {
+    if (mapping[header] !== undefined) return;
+    const name = normalizeText(header);
+    const match = comparisonByName.get(name);
+    if (match !== undefined) {
+      mapping[header] = match;
+      matchedComparison.add(match);
+      comparisonByName.delete(name);
+    } else {
+      unmatchedBase.push(header);
+    }
+  });
+
+  return {
+    mapping,
+    unmatchedBase,
+    unmatchedComparison: comparisonHeaders.filter(header => !matchedComparison.has(header))
+  };
+};
+
+// Escolhe gulosamente até `maxColumns` colunas cuja combinação identifica as linhas
+const suggestKeyColumns = (profile, headerMapping, maxColumns = 3) => {
+  const { sample } = profile;
+  if (sample.length === 0) return [];
+
+  const candidates = profile.columns
+    .filter(column =>
+      headerMapping.mapping[column.header] !== undefined &&
+      column.nullRate <= KEY_MAX_NULL_RATE &&
+      column.distinctEstimate > 1
+    )
+    .sort((a, b) => b.uniqueness - a.uniqueness)
+    .slice(0, KEY_MAX_CANDIDATES);
+
+  // Combinações contadas exatamente: dois hashes de 32 bits por linha formam uma
+  // impressão digital de 53 bits, sem colisões relevantes em uma amostra deste tamanho
+  const combine = (previous, column) => {
+    const high = new Uint32Array(sample.length);
+    const low = new Uint32Array(sample.length);
+    const seen = new Set();
+    for (let i = 0; i < sample.length; i++) {
+      const value = sample[i][column.index];
+      const text = isEmptyValue(value) ? '' : String(value).trim();
+      high[i] = hashString(text, previous.high[i]);
+      low[i] = hashString(text, previous.low[i]);
+      seen.add((high[i] & 0x1fffff) * 0x100000000 + low[i]);
+    }
+    return { high, low, uniqueness: seen.size / sample.length };
+  };
+
+  const keys = [];
+  let combined = {
+    high: new Uint32Array(sample.length).fill(0x9e3779b9),
+    low: new Uint32Array(sample.length).fill(0x811c9dc5),
+    uniqueness: 0
+  };
+
+  while (keys.length < maxColumns && combined.uniqueness < KEY_UNIQUENESS_TARGET) {
+    let best = null;
+    candidates.forEach(column => {
+      if (keys.includes(column)) return;
+      const next = combine(combined, column);
+      if (next.uniqueness > (best ? best.uniqueness : combined.uniqueness + 0.01)) {
+        best = { ...next, column };
+      }
+    });
+    if (!best) break;
+    keys.push(best.column);
+    combined = best;
+  }
+
+  return keys.map(column => column.header);
+};
+
+// Dígitos que cabem em centavos sem perda de precisão (Number.MAX_SAFE_INTEGER tem 16)
+const MAX_AMOUNT_DIGITS = 15;
+
+// Converte valores no formato brasileiro ("1.234,56", "(10,00)", "R$ 5,00 D") em centavos.
+// Percorre os caracteres uma única vez: é chamado para cada linha do arquivo.
+// Retorna NaN para o que não é um valor monetário ("N/A", "-") ou tem dígitos demais
+// (códigos de barras, identificadores), que devem ser tratados como texto.
+const parseAmount = (value) => {
+  if (typeof value === 'number') {
+    const cents = Math.round(value * 100);
+    return Number.isSafeInteger(cents) ? cents : NaN;
+  }
+  const text = String(value).trim();
+  if (!AMOUNT_PATTERN.test(text)) return NaN;
+  let cents = 0;
+  let digits = 0;
+  let decimals = -1;
+  let negative = false;
+  for (let i = 0; i < text.length; i++) {
+    const code = text.charCodeAt(i);
+    if (code >= 48 && code <= 57) {
+      cents = cents * 10 + (code - 48);
+      digits++;
+      if (decimals >= 0) decimals++;
+    } else if (code === 44 || code === 46) {
+      decimals = 0;
+    } else if (code === 45 || code === 40) {
+      negative = true;
+    }
+  }
+  if (digits > MAX_AMOUNT_DIGITS) return NaN;
+  const last = text.charCodeAt(text.length - 1);
+  if (last === 68 || last === 100) negative = true;
+  // Separador seguido de três dígitos é de milhar, não decimal
+  cents *= decimals === -1 || decimals > 2 ? 100 : 10 ** (2 - decimals);
+  return negative ? -cents : cents;
+};
+
+// Datas em aaaa-mm-dd, dd/mm/aaaa ou dd/mm/aa (com hora opcional, como nas células de
+// data e hora do Excel) viram aaaa-mm-dd[ hh:mm[:ss]]
+const normalizeDate = (value) => {
+  const text = String(value).trim();
+  const iso = text.match(/^(\d{4})-(\d{2})-(\d{2})/);
+  const dayFirst = iso ? null : text.match(/^(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})/);
+  if (!iso && !dayFirst) return normalizeText(text);
+
+  let day;
+  if (iso) {
+    day = `${iso[1]}-${iso[2]}-${iso[3]}`;
+  } else {
+    const year = dayFirst[3].length === 2 ? `20${dayFirst[3]}` : dayFirst[3];
+    day = `${year}-${pad2(dayFirst[2])}-${pad2(dayFirst[1])}`;
+  }
+
+  const time = text.slice((iso || dayFirst)[0].length).match(/(\d{1,2}):(\d{2})(?::(\d{2}))?/);
+  if (!time) return day;
+  const seconds = Number(time[3] || 0);
+  if (Number(time[1]) === 0 && Number(time[2]) === 0 && seconds === 0) return day;
+  return `${day} ${formatTime(Number(time[1]), Number(time[2]), seconds)}`;
+};
+
+// Marca, no cache de hashes por valor, as células vazias
+const EMPTY_HASH = -1;
+
+// Colunas de texto abaixo desta unicidade têm o hash de cada valor memorizado
+const MEMOIZE_MAX_UNIQUENESS = 0.5;
+
+// Impressão digital de 53 bits por linha (limite de precisão exata do Number), calculada
+// coluna a coluna com dois hashes de 32 bits. Valores monetários válidos são convertidos
+// direto para centavos. Datas e textos repetitivos têm o hash do valor normalizado
+// memorizado por coluna; históricos quase todos distintos são hasheados direto, já que
+// o Map só cresceria. Linhas com todas as colunas-chave vazias recebem NaN.
+const fingerprintRows = (rows, keyColumns) => {
+  const high = new Uint32Array(rows.length).fill(0x9e3779b9);
+  const low = new Uint32Array(rows.length).fill(0x811c9dc5);
+  const empty = new Uint8Array(rows.length).fill(1);
+
+  keyColumns.forEach(({ index, type, uniqueness }) => {
+    const memoize = type === 'date' || uniqueness < MEMOIZE_MAX_UNIQUENESS;
+    const valueHashes = new Map();
+    for (let i = 0; i < rows.length; i++) {
+      const value = rows[i] ? rows[i][index] : undefined;
+      const cents = type === 'amount' && value !== undefined && value !== null && value !== ''
+        ? parseAmount(value)
+        : NaN;
+      let valueHash;
+      if (!Number.isNaN(cents)) {
+        valueHash = mixHash(cents | 0, Math.floor(cents / 0x100000000));
+      } else if (!memoize) {
+        valueHash = isEmptyValue(value) ? EMPTY_HASH : hashNormalizedText(value);
+      } else {
+        valueHash = valueHashes.get(value);
+        if (valueHash === undefined) {
+          if (isEmptyValue(value)) {
+            valueHash = EMPTY_HASH;
+          } else if (type === 'date') {
+            valueHash = hashString(normalizeDate(value));
+          } else {
+            valueHash = hashNormalizedText(value);
+          }
+          valueHashes.set(value, valueHash);
+        }
+      }
+      if (valueHash !== EMPTY_HASH) empty[i] = 0;
+      high[i] = mixHash(high[i], valueHash);
+      low[i] = mixHash(low[i] ^ 0x5bd1e995, valueHash);
+    }
+  });
+
+  const fingerprints = new Float64Array(rows.length);
+  for (let i = 0; i < rows.length; i++) {
+    fingerprints[i] = empty[i] ? NaN : (high[i] & 0x1fffff) * 0x100000000 + low[i];
+  }
+  return fingerprints;
+};
+
+// Agrupa as linhas com a mesma impressão digital: ordenação nativa do Float64Array
+// para achar os valores repetidos e uma única passada para coletar as linhas
+const findDuplicateGroups = (fingerprints) => {
+  const sorted = Float64Array.from(fingerprints).sort();
+  const duplicated = new Set();
+  for (let i = 1; i < sorted.length; i++) {
+    if (sorted[i] === sorted[i - 1]) {
+      duplicated.add(sorted[i]);
+    }
+  }
+  if (duplicated.size === 0) return [];
+
+  const groups = new Map();
+  for (let i = 0; i < fingerprints.length; i++) {
+    if (!duplicated.has(fingerprints[i])) continue;
+    if (!groups.has(fingerprints[i])) {
+      groups.set(fingerprints[i], []);
+    }
+    groups.get(fingerprints[i]).push(i);
+  }
+  return Array.from(groups.values());
+};
+
+// Quantidade máxima de esquemas e validações guardados em memória
+const SCHEMA_CACHE_LIMIT = 50;
+
+// Índices estruturais por impressão digital de esquema e validações de formatação já feitas.
+// Ficam fora do componente para sobreviver a "Nova Comparação": a maioria dos arquivos
+// vem de poucos modelos de exportação fixos.
+const schemaIndexCache = new Map();
+const formattingValidationCache = new Map();
+
+const rememberInCache = (cache, key, value) => {
+  if (cache.size >= SCHEMA_CACHE_LIMIT) {
+    cache.delete(cache.keys().next().value);
+  }
+  cache.set(key, value);
+  return value;
+};
+
+// Impressão digital do esquema: cabeçalhos e tipos inferidos de cada coluna. Os
+// cabeçalhos entram com o texto exato, já que acento e caixa contam como formatação.
+const schemaFingerprint = (headers, types) => {
+  let high = 0x9e3779b9;
+  let low = 0x811c9dc5;
+  headers.forEach((header, index) => {
+    const column = `${String(header ?? '')}\u001f${types[index] || 'text'}`;
+    high = hashString(column, high);
+    low = hashString(column, low);
+  });
+  return `${headers.length}:${high.toString(16)}:${low.toString(16)}`;
+};
+
+// Índice que preserva a ordem: cabeçalho -> posição da primeira ocorrência
+const getSchemaIndex = (headers, profile) => {
+  const types = profile ? profile.columns.map(column => column.type) : [];
+  const fingerprint = schemaFingerprint(headers, types);
+  const cached = schemaIndexCache.get(fingerprint);
+  if (cached) return cached;
+
+  const positions = new Map();
+  headers.forEach((header, index) => {
+    if (!positions.has(header)) {
+      positions.set(header, index);
+    }
+  });
+  return rememberInCache(schemaIndexCache, fingerprint, { fingerprint, headers, types, positions });
+};
+
+// Nomes usuais das colunas de valor e de histórico nos extratos e na exportação do Nibo
+const AMOUNT_HEADER_PATTERN = /\b(valor|montante|debito|credito)\b/;
+const MEMO_HEADER_PATTERN = /\b(historico|descricao|memo|complemento)\b/;
+// O saldo acumulado muda a cada linha e nunca identifica um lançamento
+const BALANCE_HEADER_PATTERN = /\bsaldo\b/;
+// Colunas quase únicas (documento, identificador) separariam até lançamentos reimportados
+const NEAR_UNIQUE_THRESHOLD = 0.99;
+// Linhas listadas na mensagem de cada grupo de lançamentos duplicados
+const MAX_DUPLICATE_ROWS_SHOWN = 10;
+
+// Colunas que identificam um lançamento, presentes nos dois arquivos: a data, o valor
+// (ou débito e crédito) e o histórico. Valor e histórico são reconhecidos pelo nome; na
+// falta dele, usa-se uma coluna do tipo certo que não seja quase única. Retorna null se
+// faltar alguma das três.
+const findPostingKeyColumns = (profile, headerMapping) => {
+  const candidates = profile.columns.filter(column =>
+    headerMapping.mapping[column.header] !== undefined &&
+    column.type !== 'empty' &&
+    !BALANCE_HEADER_PATTERN.test(column.normalizedName)
+  );
+  const fallbacks = candidates.filter(column => column.uniqueness < NEAR_UNIQUE_THRESHOLD);
+
+  const date = candidates.find(column => column.type === 'date');
+
+  const namedAmounts = candidates
+    .filter(column => column.type !== 'date' && AMOUNT_HEADER_PATTERN.test(column.normalizedName))
+    .map(column => ({ ...column, type: 'amount' }));
+  const amounts = namedAmounts.length > 0
+    ? namedAmounts
+    : fallbacks.filter(column => column.type === 'amount').slice(0, 1);
+
+  const memo = candidates.find(column =>
+    column !== date && MEMO_HEADER_PATTERN.test(column.normalizedName)
+  ) || fallbacks
+    .filter(column => column.type === 'text')
+    .reduce((best, column) => (!best || column.uniqueness > best.uniqueness ? column : best), null);
+
+  return date && amounts.length > 0 && memo ? [date, ...amounts, memo] : null;
+};
+
+const formatPercent = (ratio) => `${Math.round(ratio * 100)}%`;
+
 const FileComparisonTool = () => {
   const [baseFile, setBaseFile] = useState(null);
   const [comparisonFile, setComparisonFile] = useState(null);
@@ -23,6 +577,10 @@ const FileComparisonTool = () => {
   const [results, setResults] = useState(null);
   const [loading, setLoading] = useState(false);
   const [currentStep, setCurrentStep] = useState(1);
+  const [baseProfile, setBaseProfile] = useState(null);
+  const [comparisonProfile, setComparisonProfile] = useState(null);
+  const [headerMapping, setHeaderMapping] = useState(null);
+  const [suggestedColumns, setSuggestedColumns] = useState([]);
 
   const processExcelFile = async (file) => {
     return new Promise((resolve, reject) => {
@@ -30,10 +588,19 @@ const FileComparisonTool = () => {
       reader.onload = (e) => {
         try {
           const data = new Uint8Array(e.target.result);
-          const workbook = XLSX.read(data, { type: 'array' });
+          const workbook = XLSX.read(data, { type: 'array', cellDates: true });
           const sheetName = workbook.SheetNames[0];
           const worksheet = workbook.Sheets[sheetName];
           const jsonData = XLSX.utils.sheet_to_json(worksheet, { header: 1 });
+
+          // Sem conversão, células de data e hora chegariam como número serial e seriam tipadas como valor
+          jsonData.forEach(row => {
+            for (let i = 0; i < row.length; i++) {
+              if (row[i] instanceof Date) {
+                row[i] = formatExcelDate(row[i]);
+              }
+            }
+          });
           
           if (jsonData.length === 0) {
             reject(new Error('Arquivo Excel vazio'));
@@ -93,12 +660,17 @@ const FileComparisonTool = () => {
         setBaseFile(file);
         setBaseData(processedData);
         setAvailableColumns(processedData.headers);
+        setBaseProfile(profileColumns(processedData));
         // Não avança automaticamente para o passo 2
       } else {
         setComparisonFile(file);
         setComparisonData(processedData);
+        setComparisonProfile(profileColumns(processedData));
         // Só avança para o passo 2 quando ambos os arquivos estão carregados
         if (baseData) {
+          const mapping = buildHeaderMapping(baseData.headers, processedData.headers);
+          setHeaderMapping(mapping);
+          setSuggestedColumns(suggestKeyColumns(baseProfile, mapping));
           setCurrentStep(2);
         }
       }
@@ -117,16 +689,35 @@ const FileComparisonTool = () => {
     );
   };
 
+  const getFormattingSchemas = () => {
+    const baseSchema = getSchemaIndex(baseData.headers, baseProfile);
+    const comparisonSchema = getSchemaIndex(comparisonData.headers, comparisonProfile);
+    return {
+      baseSchema,
+      comparisonSchema,
+      cacheKey: `${baseSchema.fingerprint}|${comparisonSchema.fingerprint}|${JSON.stringify(selectedColumns)}`
+    };
+  };
+
   const compareFormatting = () => {
+    const { baseSchema, comparisonSchema, cacheKey } = getFormattingSchemas();
+
+    // Modelo já validado: reaproveita o resultado sem percorrer as colunas
+    const cached = formattingValidationCache.get(cacheKey);
+    if (cached) {
+      return { ...cached, templateRecognized: true };
+    }
+
     const results = {
       type: 'formatting',
       issues: [],
       summary: {}
     };
+    const selectedSet = new Set(selectedColumns);
 
     // Verificar presença de colunas obrigatórias
     const missingColumns = selectedColumns.filter(col => 
-      !comparisonData.headers.includes(col)
+      !comparisonSchema.positions.has(col)
     );
     if (missingColumns.length > 0) {
       results.issues.push({
@@ -137,10 +728,13 @@ const FileComparisonTool = () => {
     }
 
     // Verificar ordem das colunas
-    const baseOrder = baseData.headers.filter(col => selectedColumns.includes(col));
-    const comparisonOrder = comparisonData.headers.filter(col => selectedColumns.includes(col));
+    const baseOrder = baseData.headers.filter(col => selectedSet.has(col));
+    const comparisonOrder = comparisonData.headers.filter(col => selectedSet.has(col));
     
-    if (JSON.stringify(baseOrder) !== JSON.stringify(comparisonOrder)) {
+    if (
+      baseOrder.length !== comparisonOrder.length ||
+      baseOrder.some((col, index) => col !== comparisonOrder[index])
+    ) {
       results.issues.push({
         type: 'column_order',
         severity: 'medium',
@@ -148,6 +742,26 @@ const FileComparisonTool = () => {
       });
     }
 
+    // Verificar tipo de dado das colunas obrigatórias
+    if (baseSchema.types.length > 0 && comparisonSchema.types.length > 0) {
+      // Colunas sem nenhum valor na amostra não têm tipo a comparar
+      const typeMismatches = selectedColumns.filter(col => {
+        if (!baseSchema.positions.has(col) || !comparisonSchema.positions.has(col)) return false;
+        const baseType = baseSchema.types[baseSchema.positions.get(col)];
+        const comparisonType = comparisonSchema.types[comparisonSchema.positions.get(col)];
+        return baseType !== 'empty' && comparisonType !== 'empty' && baseType !== comparisonType;
+      });
+      if (typeMismatches.length > 0) {
+        results.issues.push({
+          type: 'column_type',
+          severity: 'medium',
+          message: `Tipo de dado diferente nas colunas: ${typeMismatches.map(col =>
+            `${col} (${TYPE_LABELS[baseSchema.types[baseSchema.positions.get(col)]]} vs ${TYPE_LABELS[comparisonSchema.types[comparisonSchema.positions.get(col)]]})`
+          ).join(', ')}`
+        });
+      }
+    }
+
     // Verificar estrutura geral
     if (baseData.headers.length !== comparisonData.headers.length) {
       results.issues.push({
@@ -159,7 +773,7 @@ const FileComparisonTool = () => {
 
     // Verificar cabeçalhos diferentes
     const differentHeaders = baseData.headers.filter(header => 
-      !comparisonData.headers.includes(header)
+      !comparisonSchema.positions.has(header)
     );
     if (differentHeaders.length > 0) {
       results.issues.push({
@@ -176,7 +790,7 @@ const FileComparisonTool = () => {
       lowSeverity: results.issues.filter(i => i.severity === 'low').length
     };
 
-    return results;
+    return rememberInCache(formattingValidationCache, cacheKey, results);
   };
 
   const compareContent = () => {
@@ -192,9 +806,39 @@ const FileComparisonTool = () => {
     ).filter(index => index !== -1);
 
     const comparisonColumnIndices = selectedColumns.map(col => 
-      comparisonData.headers.indexOf(col)
+      comparisonData.headers.indexOf(headerMapping?.mapping[col] ?? col)
     ).filter(index => index !== -1);
 
+    // Pré-verificação: lançamentos duplicados (mesma data, valor e histórico) em cada arquivo
+    const postingKey = baseProfile && headerMapping
+      ? findPostingKeyColumns(baseProfile, headerMapping)
+      : null;
+    if (postingKey) {
+      [
+        { label: 'base', data: baseData, headerOf: col => col },
+        { label: 'de comparação', data: comparisonData, headerOf: col => headerMapping.mapping[col] }
+      ].forEach(({ label, data, headerOf }) => {
+        const keyColumns = postingKey.map(column => ({
+          index: data.headers.indexOf(headerOf(column.header)),
+          type: column.type,
+          uniqueness: column.uniqueness
+        }));
+
+        findDuplicateGroups(fingerprintRows(data.rows, keyColumns)).forEach(group => {
+          const rows = group.slice(0, MAX_DUPLICATE_ROWS_SHOWN).map(index => index + 1);
+          const remaining = group.length - rows.length;
+          results.differences.push({
+            row: rows[0],
+            type: 'duplicate_row',
+            rows,
+            count: group.length,
+            message: `Lançamento duplicado no arquivo ${label}: linhas ${rows.join(', ')}` +
+              (remaining > 0 ? ` e mais ${remaining}` : '')
+          });
+        });
+      });
+    }
+
     // Comparar linhas
     const maxRows = Math.max(baseData.rows.length, comparisonData.rows.length);
     
@@ -247,13 +891,21 @@ const FileComparisonTool = () => {
       totalDifferences: results.differences.length,
       valueDifferences: results.differences.filter(d => d.type === 'value_difference').length,
       missingRows: results.differences.filter(d => d.type === 'missing_row').length,
-      extraRows: results.differences.filter(d => d.type === 'extra_row').length
+      extraRows: results.differences.filter(d => d.type === 'extra_row').length,
+      duplicateRows: results.differences.filter(d => d.type === 'duplicate_row').length
     };
 
     return results;
   };
 
   const runComparison = () => {
+    // Modelo já reconhecido: o resultado sai do cache, sem a espera do processamento
+    if (comparisonMode === 'formatting' && formattingValidationCache.has(getFormattingSchemas().cacheKey)) {
+      setResults(compareFormatting());
+      setCurrentStep(4);
+      return;
+    }
+
     setLoading(true);
     
     setTimeout(() => {
@@ -278,6 +930,10 @@ const FileComparisonTool = () => {
     setComparisonData(null);
     setAvailableColumns([]);
     setSelectedColumns([]);
+    setBaseProfile(null);
+    setComparisonProfile(null);
+    setHeaderMapping(null);
+    setSuggestedColumns([]);
     setComparisonMode('');
     setResults(null);
     setCurrentStep(1);
@@ -438,6 +1094,19 @@ const FileComparisonTool = () => {
             </p>
           </div>
 
+          {/* A sugestão é só um apoio: não altera a seleção nem o pareamento das linhas */}
+          {suggestedColumns.length > 0 && (
+            <div className="bg-green-50 border border-green-200 rounded-lg p-4">
+              <div className="text-sm font-medium text-green-900">
+                Colunas que identificam cada linha: {suggestedColumns.join(', ')}
+              </div>
+              <div className="text-xs text-green-700">
+                Sugestão para conferência, baseada em {baseProfile.sample.length} de {baseProfile.totalRows} linhas
+                do arquivo base. A comparação de conteúdo continua linha a linha, apenas nas colunas selecionadas.
+              </div>
+            </div>
+          )}
+
           <div className="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-3">
             {availableColumns.map((column, index) => (
               <div
@@ -460,7 +1129,31 @@ const FileComparisonTool = () => {
                   }`}>
                     {column}
                   </span>
+                  {suggestedColumns.includes(column) && (
+                    <span className="ml-2 px-1.5 py-0.5 rounded text-xs font-medium text-green-700 bg-green-100">
+                      chave
+                    </span>
+                  )}
                 </div>
+                {baseProfile && baseProfile.columns[index] && (
+                  <div className="mt-1 ml-7 text-xs text-gray-500">
+                    {TYPE_LABELS[baseProfile.columns[index].type]}
+                    {' · '}{formatPercent(baseProfile.columns[index].nullRate)} vazios
+                    {' · '}{formatPercent(baseProfile.columns[index].uniqueness)} únicos
+                    {' · '}~{baseProfile.columns[index].distinctEstimate.toLocaleString('pt-BR')} distintos
+                  </div>
+                )}
+                {headerMapping && (
+                  headerMapping.mapping[column] === undefined ? (
+                    <div className="mt-1 ml-7 text-xs text-red-500">
+                      Ausente no arquivo de comparação
+                    </div>
+                  ) : headerMapping.mapping[column] !== column && (
+                    <div className="mt-1 ml-7 text-xs text-blue-600">
+                      ↔ {headerMapping.mapping[column]}
+                    </div>
+                  )
+                )}
               </div>
             ))}
           </div>
@@ -541,6 +1234,7 @@ const FileComparisonTool = () => {
                     <li>• Linhas ausentes</li>
                     <li>• Linhas extras</li>
                     <li>• Valores divergentes</li>
+                    <li>• Lançamentos duplicados</li>
                     <li>• Análise detalhada dos dados</li>
                   </ul>
                 </div>
@@ -579,12 +1273,16 @@ const FileComparisonTool = () => {
               Resultados da Comparação - {results.type === 'formatting' ? 'Formatação' : 'Conteúdo'}
             </h3>
             <p className="text-sm text-gray-600">
-              Análise completa entre os arquivos selecionados
+              {results.templateRecognized
+                ? 'Modelo reconhecido: validação reaproveitada de um arquivo com a mesma estrutura'
+                : 'Análise completa entre os arquivos selecionados'}
             </p>
           </div>
 
           {/* Summary */}
-          <div className="grid grid-cols-2 md:grid-cols-4 gap-4">
+          <div className={`grid grid-cols-2 gap-4 ${
+            results.type === 'formatting' ? 'md:grid-cols-4' : 'md:grid-cols-5'
+          }`}>
             {results.type === 'formatting' ? (
               <>
                 <div className="bg-white border border-gray-200 rounded-lg p-4 text-center">
@@ -622,6 +1320,10 @@ const FileComparisonTool = () => {
                   <div className="text-2xl font-bold text-blue-600">{results.summary.extraRows}</div>
                   <div className="text-sm text-blue-600">Linhas Extras</div>
                 </div>
+                <div className="bg-white border border-purple-200 rounded-lg p-4 text-center">
+                  <div className="text-2xl font-bold text-purple-600">{results.summary.duplicateRows}</div>
+                  <div className="text-sm text-purple-600">Lançamentos Duplicados</div>
+                </div>
               </>
             )}
           </div>